@@ -13,17 +13,30 @@ if sys.version_info < (3, 9, 0):
 # Pre-check dependencies (and in particular their versions) at runtime
 # Note 1: added since, despite the (minimum) requirements during install, packages can be downgraded or removed later
 # Note 2: deliberately not in a separate module, since this is the entry point of the package and dependencies already be used after
+# Note 3: the check can be skipped by setting the environment variable IEEGPREP_SKIP_DEPCHECK=1 (e.g. for CLI callers
+#         that import the package repeatedly in an environment that is known to be valid)
 #
+from os import environ
 from importlib.metadata import version, PackageNotFoundError, requires
-from re import sub as re_sub, split as re_split
+from re import compile as re_compile
+_TRAIL_ZEROS = re_compile(r'(\.0+)*$')
+_REQ_SPLIT = re_compile('>=|==')
 def normalize_version(v):
-    return [int(x) for x in re_sub(r'(\.0+)*$','', v).split(".")]
+    return [int(x) for x in _TRAIL_ZEROS.sub('', v).split(".")]
 
 try:
-    require_lines = [p for p in requires('ieegprep')]
+    require_lines = [] if environ.get('IEEGPREP_SKIP_DEPCHECK', '0') == '1' else (requires('ieegprep') or [])
     for req_line in require_lines:
+
+        # skip requirements with an environment marker (PEP 508, e.g. '; sys_platform == "win32"' or '; extra == "dev"')
+        # Note: these only apply to specific platforms, python versions or optional extras, and evaluating the markers
+        #       would require the 'packaging' package, which is not a dependency
+        req_line, _, req_marker = req_line.partition(';')
+        if req_marker.strip():
+            continue
+
         for req_line_part in req_line.split(','):
-            req_args = re_split('>=|==', req_line_part.strip())
+            req_args = _REQ_SPLIT.split(req_line_part.strip())
             if len(req_args) == 2:
                 req_args[0] = req_args[0].strip()
                 req_args[1] = req_args[1].strip()
@@ -42,10 +55,50 @@ except PackageNotFoundError as err:
 
 #
 # flatten access
+# Note: the submodules are loaded on first attribute access (PEP 562) since these pull in numpy, scipy, pymef, etc.,
+#       which would otherwise make a plain 'import ieegprep' take considerably longer than needed. The subpackages
+#       (bids, fileio and utils) each load their own submodules in the same way (listed in their '_submodules'), so
+#       that dotted access such as 'ieegprep.bids.data_epoch' also works after only importing the package
 #
 from ieegprep.version import __version__
-from ieegprep.bids.data_epoch import load_data_epochs, load_data_epochs_averages
-from ieegprep.bids.data_structure import list_bids_datasets
-from ieegprep.bids.rereferencing import RerefStruct
-from ieegprep.bids.sidecars import load_event_info, load_elec_stim_events, load_channel_info, load_ieeg_sidecar
-from ieegprep.fileio.IeegDataReader import VALID_FORMAT_EXTENSIONS, IeegDataReader
+
+_lazy_attributes = {
+    'load_data_epochs':             'ieegprep.bids.data_epoch',
+    'load_data_epochs_averages':    'ieegprep.bids.data_epoch',
+    'list_bids_datasets':           'ieegprep.bids.data_structure',
+    'RerefStruct':                  'ieegprep.bids.rereferencing',
+    'load_event_info':              'ieegprep.bids.sidecars',
+    'load_elec_stim_events':        'ieegprep.bids.sidecars',
+    'load_channel_info':            'ieegprep.bids.sidecars',
+    'load_ieeg_sidecar':            'ieegprep.bids.sidecars',
+    'VALID_FORMAT_EXTENSIONS':      'ieegprep.fileio.IeegDataReader',
+    'IeegDataReader':               'ieegprep.fileio.IeegDataReader'
+}
+_lazy_submodules = ('bids', 'fileio', 'utils')
+
+__all__ = ['__version__'] + list(_lazy_attributes.keys())
+
+
+def __getattr__(name):
+    from importlib import import_module
+    if name in _lazy_attributes:
+        attribute = getattr(import_module(_lazy_attributes[name]), name)
+        globals()[name] = attribute
+        return attribute
+    if name in _lazy_submodules:
+        return import_module('ieegprep.' + name)
+    raise AttributeError('module \'' + __name__ + '\' has no attribute \'' + name + '\'')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | set(_lazy_submodules))
+
+
+# allow IDEs and static type checkers to resolve the flattened attributes
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ieegprep.bids.data_epoch import load_data_epochs, load_data_epochs_averages
+    from ieegprep.bids.data_structure import list_bids_datasets
+    from ieegprep.bids.rereferencing import RerefStruct
+    from ieegprep.bids.sidecars import load_event_info, load_elec_stim_events, load_channel_info, load_ieeg_sidecar
+    from ieegprep.fileio.IeegDataReader import VALID_FORMAT_EXTENSIONS, IeegDataReader
@@ -1,2 +1,15 @@
 # define directory as package
 
+
+_submodules = ('data_epoch', 'data_structure', 'rereferencing', 'sidecars')
+
+
+def __getattr__(name):
+    if name in _submodules:
+        from importlib import import_module
+        return import_module(__name__ + '.' + name)
+    raise AttributeError('module \'' + __name__ + '\' has no attribute \'' + name + '\'')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
@@ -14,46 +14,73 @@ import time
 import subprocess
 from ieegprep.utils.console import ConsoleColors
 
+# reference to psutil's virtual_memory function, imported on first use (see allocate_array)
+_virtual_memory = None
+
+# the amount of memory (in bytes) that should remain available after creating an array (see allocate_array)
+_MEMORY_SAFETY_MARGIN = 256 * 1024 ** 2
+
+# arrays smaller than this size (in bytes) are created without checking the available memory (see allocate_array)
+_MEMORY_CHECK_MIN_BYTES = 1024 ** 2
+
 
 def allocate_array(dimensions, fill_value=float('nan'), dtype=float):
     """
-    Create and immediately allocate the memory for an x-dimensional array
+    Create an x-dimensional array, and immediately allocate its memory when filled with a non-zero value
 
-    Before allocating the memory, this function checks if is enough memory is available (this is needed since when a
+    Before creating the array, this function checks if is enough memory is available (this is needed since when a
     numpy array is allocated and there is not enough memory, sometimes python crashes without the chance to catch an error).
+    Note that only a non-zero fill_value commits the memory immediately. With a fill_value of 0 or None the memory pages
+    are only committed by the OS when they are written, so running out of memory can then still happen later (outside
+    of this function) and cannot be caught here.
 
     Args:
         dimensions (int or tuple):
-        fill_value (any numeric):
+        fill_value (any numeric):   The value to initialize the array with. A value of 0 will request zeroed memory from
+                                    the OS (which is mapped lazily instead of written), and None will leave the array
+                                    uninitialized (for callers that will overwrite every element anyway)
         dtype (str):
 
     Returns:
-        data (ndarray):             An initialized x-dimensional array, or None if insufficient memory available
+        data (ndarray):             An x-dimensional array, initialized with the fill_value (unless None)
+
+    Raises:
+        MemoryError:                If there is insufficient memory available to create the array
 
     """
 
     # Note: numpy is a pretty elaborate package (causing a significant, 80ms+ time to import uncached) and since this
     #       module offers non-numpy miscellaneous functions to be used, we import local instead of top of the module
     import numpy as np
+    global _virtual_memory
 
     # initialize a data buffer
     mem = None
     try:
 
-        # create a ndarray object (no memory is allocated here)
-        data = np.empty(dimensions, dtype=dtype)
-        data_bytes_needed = data.nbytes
+        # determine the number of bytes needed (without creating the array yet)
+        data_bytes_needed = int(np.prod(dimensions)) * np.dtype(dtype).itemsize
 
-        # import here to decrease the package dependencies for this module
-        from psutil import virtual_memory
+        # check if there is enough memory available (skipped for small arrays, less than 1MB)
+        # Note: a safety margin (256MB) is kept, since filling an array that barely fits in the available memory can
+        #       still cause the OS to run out of memory while the pages are being committed
+        if data_bytes_needed >= _MEMORY_CHECK_MIN_BYTES:
 
-        # check if there is enough memory available
-        mem = virtual_memory()
-        if mem.available <= data_bytes_needed:
-            raise MemoryError()
+            # import psutil only once on first use, to decrease the package dependencies for this module
+            if _virtual_memory is None:
+                from psutil import virtual_memory as _virtual_memory
 
-        # allocate the memory
-        data.fill(fill_value)
+            mem = _virtual_memory()
+            if mem.available - _MEMORY_SAFETY_MARGIN <= data_bytes_needed:
+                raise MemoryError()
+
+        # allocate and initialize the memory
+        if fill_value is None:
+            data = np.empty(dimensions, dtype=dtype)
+        elif fill_value == 0:
+            data = np.zeros(dimensions, dtype=dtype)
+        else:
+            data = np.full(dimensions, fill_value, dtype=dtype)
 
         #
         return data
@@ -62,26 +89,39 @@ def allocate_array(dimensions, fill_value=float('nan'), dtype=float):
         if mem is None:
             logging.error('Not enough memory available to create array.\n(for docker users: extend the memory resources available to the docker service)')
         else:
-            logging.error('Not enough memory available to create array.\nAt least ' + str(int((mem.used + data_bytes_needed) / (1024.0 ** 2))) + ' MB total is needed, most likely more.\n(for docker users: extend the memory resources available to the docker service)')
+            logging.error('Not enough memory available to create array.\nAt least ' + str(int((mem.used + data_bytes_needed + _MEMORY_SAFETY_MARGIN) / (1024.0 ** 2))) + ' MB total is needed, most likely more.\n(for docker users: extend the memory resources available to the docker service)')
         raise MemoryError('Not enough memory available to create array.')
 
 
 def is_number(value):
+    """
+    Check whether a value is numeric or can be converted to a number (e.g. a numeric string)
+
+    Args:
+        value (any):                The value to check
+
+    Returns:
+        True if the value is a number or can be converted to one, False otherwise
+
+    """
     try:
         float(value)
         return True
-    except:
+    except (TypeError, ValueError, OverflowError):
         return False
 
 
 def run_cmd(command, env={}):
-    merged_env = os.environ
-    merged_env.update(env)
+
+    # build a copy of the environment (updating os.environ directly would change the environment of this process)
+    merged_env = {**os.environ, **env}
     merged_env.pop('DEBUG', None)
+
+    # only a command string needs a shell to be interpreted, a list of arguments is executed directly
     process = subprocess.run(command,
                              stdout=subprocess.PIPE,
                              stderr=subprocess.STDOUT,
-                             shell=True,
+                             shell=isinstance(command, str),
                              universal_newlines=True,
                              env=merged_env,
                              encoding='utf-8')
@@ -114,25 +154,32 @@ def time_func(fun, pre_fun = None, loop = 5, *args, **kwargs):
 
     if loop < 1:
         loop = 1
-    times = np.zeros(loop)
+    times = [0] * loop
+    pre = pre_fun or (lambda: None)
+    perf_counter_ns = time.perf_counter_ns
 
     # repeatedly call function
     for iLoop in range(0, loop):
 
-        # execute the pre-function if there is one
-        if pre_fun :
-            pre_fun()
+        # execute the pre-function (if there is one)
+        pre()
 
-        # execute function and measure
-        time1 = time.time()
+        # execute function and measure (using the monotonic high-resolution counter, in nanoseconds)
+        time1 = perf_counter_ns()
         fun(*args, **kwargs)
-        time2 = time.time()
+        times[iLoop] = perf_counter_ns() - time1
+
+    # convert from nanoseconds to milliseconds
+    times = [t / 1e6 for t in times]
 
-        # store
-        times[iLoop] = (time2 - time1) * 1000.0
+    # calculate the statistics
+    # Note: in plain python instead of numpy, the number of loops is usually small, in which case numpy's reductions
+    #       would add more overhead than they save. The standard deviation is the population std (like numpy's default)
+    mean = sum(times) / loop
+    std = (sum((t - mean) ** 2 for t in times) / loop) ** 0.5
 
     # return statistics
-    return times.mean(), times.std(), (times.min(), times.max()), times
+    return mean, std, (min(times), max(times)), np.asarray(times)
 
 
 def clear_virtual_cache():
@@ -153,14 +200,18 @@ def clear_virtual_cache():
             exit(1)
 
         # call clear executable
+        # Note: deliberately started through the shell (cmd.exe), which can raise the UAC prompt. Starting the executable
+        #       directly (CreateProcess) fails with 'WinError 740' when python is not already running with elevation
         os.system('RAMMap64.exe -Et')
         print('Cleared virtual memory')
 
     elif platform in ("linux", "linux2"):
 
+        # Note: the sync has to complete before dropping, since only clean (already written) pages can be dropped
+        # Note: 3 drops the page cache as well as the dentries and inodes (1 would only drop the page cache)
         os.sync()
-        with open('/proc/sys/vm/drop_caches', 'w') as f:
-            f.write("1\n")
+        with open('/proc/sys/vm/drop_caches', 'wb') as f:
+            f.write(b'3\n')
         print('Cleared virtual memory')
 
     elif platform == "darwin":
@@ -173,25 +224,55 @@ def clear_virtual_cache():
         #           e.g. john ALL = NOPASSWD: /usr/sbin/purge
         #        3. save and close the file
 
-        # create bash file to GUI prompt for a password
-        with open('./mac_prompt_pw.sh', 'w') as f:
-            f.write('#!/bin/bash\n')
-            f.write('pw="$(osascript -e \'Tell application "System Events" to display dialog "Password to purge virtual memory:" default answer "" with hidden answer\' -e \'text returned of result\' 2>/dev/null)" && echo "$pw"\n')
+        # create bash file to GUI prompt for a password (only once, the file is kept for subsequent calls)
+        # Note: the file is placed in a directory that is private to the user (created by this function), since it is
+        #       executed as SUDO_ASKPASS and handles the user's password. If that directory is not owned by the current
+        #       user or accessible to others (or is not a directory), a new private temporary directory is used instead,
+        #       which is removed again after purging
+        import stat
+        from shutil import rmtree
+        from tempfile import gettempdir, mkdtemp
+        prompt_pw_script = '#!/bin/bash\n' \
+                           'pw="$(osascript -e \'Tell application "System Events" to display dialog "Password to purge virtual memory:" default answer "" with hidden answer\' -e \'text returned of result\' 2>/dev/null)" && echo "$pw"\n'
+        prompt_pw_dir = os.path.join(gettempdir(), 'ieegprep-' + str(os.getuid()))
+        try:
+            os.makedirs(prompt_pw_dir, mode=0o700, exist_ok=True)
+        except FileExistsError:
+            # the path exists but is not a directory (e.g. a regular file or a dangling symlink), rejected below
+            pass
+        prompt_pw_dir_stat = os.lstat(prompt_pw_dir)
+        prompt_pw_temp_dir = None
+        if not stat.S_ISDIR(prompt_pw_dir_stat.st_mode) or prompt_pw_dir_stat.st_uid != os.getuid() or prompt_pw_dir_stat.st_mode & 0o077:
+            prompt_pw_dir = prompt_pw_temp_dir = mkdtemp(prefix='ieegprep-')
+        prompt_pw_path = os.path.join(prompt_pw_dir, 'mac_prompt_pw.sh')
+
+        # (re)write the file if it does not exist yet or if the content differs
+        try:
+            with open(prompt_pw_path, 'r') as f:
+                prompt_pw_valid = f.read() == prompt_pw_script
+        except OSError:
+            prompt_pw_valid = False
+        if not prompt_pw_valid:
+            with open(prompt_pw_path, 'w') as f:
+                f.write(prompt_pw_script)
+            os.chmod(prompt_pw_path, 0o700)
 
         # call the purge command while prompting for the password (MacOS for some reason requires high privileges on the Purge command)
         # (with 4 retries in case of mac 'error initializing audit plugin sudoers_audit' error)
-        os.environ['SUDO_ASKPASS'] = './mac_prompt_pw.sh'
-        os.system('chmod +x ./mac_prompt_pw.sh')
+        purge_env = {**os.environ, 'SUDO_ASKPASS': prompt_pw_path}
         retry_purge = 0
-        while retry_purge < 5:
-            if os.system('sudo -A /usr/sbin/purge') == 0:
-                break
-            else:
-                print('Retry purge')
-                retry_purge += 1
+        try:
+            while retry_purge < 5:
+                if subprocess.run(['sudo', '-A', '/usr/sbin/purge'], env=purge_env, check=False).returncode == 0:
+                    break
+                else:
+                    print('Retry purge')
+                    retry_purge += 1
+        finally:
+            if prompt_pw_temp_dir is not None:
+                rmtree(prompt_pw_temp_dir, ignore_errors=True)
         if retry_purge == 5:
             ConsoleColors.print_error('Could not purge virtual memory after 5 tries, skipping')
-        os.remove('./mac_prompt_pw.sh')
 
         #
         print('Cleared virtual memory')